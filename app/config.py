@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from functools import lru_cache
+from functools import cached_property, lru_cache
 
 
 class Settings(BaseSettings):
@@ -22,6 +22,14 @@ class Settings(BaseSettings):
     # AutoBG.ai API (specialized for automotive)
     AUTOBG_API_KEY: str = ""
     AUTOBG_API_URL: str = "https://api.autobg.ai/v1"
+
+    # Compile image kernels / run a dummy inference at startup, so the first
+    # request doesn't pay for it
+    WARMUP_ON_START: bool = True
+
+    # Local rembg fallback: use reduced-precision U2Net weights
+    # (INT8 on CPU, FP16 when the CUDA provider is available)
+    REMBG_QUANTIZED: bool = True
     
     # Cloudflare R2 (optional - for production)
     R2_ACCOUNT_ID: str = ""
@@ -44,12 +52,12 @@ class Settings(BaseSettings):
         env_file = ".env"
         extra = "ignore"
 
-    @property
+    @cached_property
     def cors_origins_list(self) -> list[str]:
-        """Parse CORS origins from string to list."""
+        """Parse CORS origins from string to list (computed once)."""
         if self.CORS_ORIGINS == "*":
             return ["*"]
-        return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
+        return [origin.strip() for origin in self.CORS_ORIGINS.split(",") if origin.strip()]
 
 
 @lru_cache()
@@ -1,20 +1,46 @@
-from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import JWTError, jwt
+import asyncio
+import hashlib
+import logging
+import time
+
+from cachetools import TTLCache
+from fastapi import HTTPException, Request, status
+import jwt
+from jwt import InvalidTokenError as JWTError
 from typing import Optional
 
 from app.config import settings
 from app.services.storage import StorageService
-from app.services.rembg_service import RembgService
 
-security = HTTPBearer()
+logger = logging.getLogger(__name__)
+
+# Advertised in the OpenAPI schema (see app.main); the header is parsed below
+BEARER_SECURITY_SCHEME = {"BearerAuth": {"type": "http", "scheme": "bearer"}}
 
+# Verified tokens, keyed by token hash -> (user, exp).
+# Only touched from the event loop, so no lock is needed.
+_JWT_CACHE_TTL = 60
+_jwt_cache: TTLCache = TTLCache(maxsize=10000, ttl=_JWT_CACHE_TTL)
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-) -> dict:
+
+async def get_current_user(request: Request) -> dict:
     """Validate JWT token and return user info."""
-    token = credentials.credentials
+    scheme, _, token = (request.headers.get("authorization") or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    key = hashlib.sha256(token.encode()).hexdigest()[:32]
+
+    cached = _jwt_cache.get(key)
+    if cached is not None:
+        user, exp = cached
+        if exp > time.time():
+            return user
+        _jwt_cache.pop(key, None)
 
     try:
         payload = jwt.decode(
@@ -29,7 +55,7 @@ async def get_current_user(
                 detail="Invalid token",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        return {
+        user = {
             "id": user_id,
             "email": payload.get("email"),
             "garage_name": payload.get("garage_name"),
@@ -41,23 +67,52 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Never keep a token past its own expiry, nor longer than the cache TTL
+    now = time.time()
+    exp = min(float(payload.get("exp", now + _JWT_CACHE_TTL)), now + _JWT_CACHE_TTL)
+    _jwt_cache[key] = (user, exp)
+    return user
+
+
+def create_image_service():
+    """Build the image service selected by configuration (runs at startup)."""
+    if settings.WARMUP_ON_START:
+        from app.services.image_ops import warm_up_kernels
+        warm_up_kernels()
+
+    if settings.AUTOBG_API_KEY:
+        # Use AutoBG.ai cloud API
+        from app.services.autobg_service import get_autobg_service
+        return get_autobg_service()
+    try:
+        # Local rembg fallback (optional dependency, see requirements.txt)
+        from app.services.rembg_service import get_rembg_service
+    except ImportError as e:
+        logger.warning("rembg not available (%s); using PIL-only processing", e)
+    else:
+        return get_rembg_service()
+    # Last resort: local PIL processing
+    from app.services.birefnet_service import get_birefnet_service
+    return get_birefnet_service()
+
 
-def get_storage_service() -> StorageService:
-    """Get storage service instance."""
-    return StorageService()
+async def get_storage_service(request: Request) -> StorageService:
+    """Get the app-scoped storage service."""
+    return request.app.state.storage
 
 
-# Singleton instance for rembg (model loaded once)
-_rembg_service: RembgService = None
+async def get_image_processing_service(request: Request):
+    """Get the app-scoped image processing service (waits for startup warmup)."""
+    task = request.app.state.image_service_task
+    if task.done() and not task.cancelled() and task.exception() is not None:
+        # A failed build would otherwise fail every request forever: log it
+        # and start a fresh one
+        logger.error("Image service startup failed, rebuilding", exc_info=task.exception())
+        task = asyncio.create_task(asyncio.to_thread(create_image_service))
+        request.app.state.image_service_task = task
+    # shield: a cancelled request must not cancel the shared build
+    return await asyncio.shield(task)
 
-def get_image_processing_service() -> RembgService:
-    """Get image processing service instance (rembg - free, self-hosted)."""
-    global _rembg_service
-    if _rembg_service is None:
-        _rembg_service = RembgService()
-    return _rembg_service
 
-# Alias for backward compatibility
-def get_nano_banana_service() -> RembgService:
-    """Deprecated: Use get_image_processing_service instead."""
-    return get_image_processing_service()
+# Deprecated alias for backward compatibility
+get_nano_banana_service = get_image_processing_service
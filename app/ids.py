@@ -0,0 +1,30 @@
+"""
+Time-ordered identifiers.
+UUIDv7 (RFC 9562) embeds the creation time, so one clock read gives both the id and the timestamp.
+"""
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+
+def uuid7(ns: Optional[int] = None) -> uuid.UUID:
+    """Build a UUIDv7 from a nanosecond unix timestamp (defaults to now)."""
+    if ns is None:
+        ns = time.time_ns()
+    ms = ns // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+    value = (
+        (ms & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76                        # version
+        | (rand >> 62 & 0xFFF) << 64       # rand_a
+        | 0b10 << 62                       # variant
+        | rand & 0x3FFF_FFFF_FFFF_FFFF     # rand_b
+    )
+    return uuid.UUID(int=value)
+
+
+def utc_from_ns(ns: int) -> datetime:
+    """Convert a nanosecond unix timestamp to an aware UTC datetime."""
+    return datetime.fromtimestamp(ns / 1e9, tz=timezone.utc)
@@ -1,28 +1,62 @@
+import asyncio
+import atexit
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
 from fastapi import FastAPI
+from fastapi.dependencies.models import Dependant
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.openapi.utils import get_openapi
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 
 from app.config import settings
+from app.deps import BEARER_SECURITY_SCHEME, create_image_service, get_current_user
 from app.routers import images, process
+from app.services.http_client import close_http_client
+from app.services.storage import StorageService
+
+# Logging: records are queued and written to stderr by a background thread,
+# so log calls never block the event loop on stdout/stderr I/O
+# Root stays at WARNING (library chatter such as httpx's per-request INFO
+# lines is dropped); only the app's own loggers log at INFO
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+logging.basicConfig(level=logging.WARNING, handlers=[QueueHandler(_log_queue)])
+logging.getLogger("app").setLevel(logging.INFO)
+_log_listener = QueueListener(_log_queue, logging.StreamHandler())
+# Started right away so import-time records are written, not held until startup
+_log_listener.start()
+atexit.register(_log_listener.stop)
+logger = logging.getLogger(__name__)
+
+# Ensure storage directories exist before the static mount below
+storage_path = os.fspath(Path(settings.STORAGE_PATH))
+os.makedirs(os.path.join(storage_path, "processed"), exist_ok=True)
+os.makedirs(os.path.join(storage_path, "uploads"), exist_ok=True)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    print(f"Starting {settings.SERVICE_NAME}...")
-    
-    # Ensure storage directories exist
-    storage_path = Path(settings.STORAGE_PATH)
-    (storage_path / "processed").mkdir(parents=True, exist_ok=True)
-    (storage_path / "uploads").mkdir(parents=True, exist_ok=True)
-    print(f"📁 Storage path: {storage_path}")
+    logger.info("Starting %s... (storage path: %s)", settings.SERVICE_NAME, storage_path)
+
+    # App-scoped services, shared by every request
+    app.state.storage = StorageService()
+    # The image backend is imported and built off the event loop so startup
+    # (and /health) is not held up; requests await the task if it is not done yet
+    app.state.image_service_task = asyncio.create_task(
+        asyncio.to_thread(create_image_service)
+    )
     
     yield
     # Shutdown
-    print(f"Shutting down {settings.SERVICE_NAME}...")
+    logger.info("Shutting down %s...", settings.SERVICE_NAME)
+    await close_http_client()
 
 
 app = FastAPI(
@@ -30,8 +64,45 @@ app = FastAPI(
     description="Image upload, processing and enhancement service",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
+def _requires_auth(dependant: Dependant) -> bool:
+    """Whether get_current_user is anywhere in a route's dependency tree."""
+    return any(
+        dep.call is get_current_user or _requires_auth(dep)
+        for dep in dependant.dependencies
+    )
+
+
+def custom_openapi():
+    """
+    OpenAPI schema with the bearer auth scheme (auth is parsed in get_current_user).
+    Only operations that depend on get_current_user are marked as secured;
+    /, /health and /process/info stay public.
+    """
+    if app.openapi_schema:
+        return app.openapi_schema
+    schema = get_openapi(
+        title=app.title,
+        version=app.version,
+        description=app.description,
+        routes=app.routes,
+    )
+    schema.setdefault("components", {})["securitySchemes"] = BEARER_SECURITY_SCHEME
+    security = [{name: []} for name in BEARER_SECURITY_SCHEME]
+    for route in app.routes:
+        if isinstance(route, APIRoute) and _requires_auth(route.dependant):
+            operations = schema["paths"].get(route.path_format, {})
+            for method in route.methods:
+                if method.lower() in operations:
+                    operations[method.lower()]["security"] = security
+    app.openapi_schema = schema
+    return schema
+
+
+app.openapi = custom_openapi
+
 # CORS - uses CORS_ORIGINS env var in production
 app.add_middleware(
     CORSMiddleware,
@@ -46,9 +117,8 @@ app.include_router(images.router, prefix="/images", tags=["Images"])
 app.include_router(process.router, prefix="/process", tags=["Processing"])
 
 # Static files for processed images (local storage)
-storage_path = Path(settings.STORAGE_PATH)
-if storage_path.exists():
-    app.mount("/storage", StaticFiles(directory=str(storage_path)), name="storage")
+if os.path.isdir(storage_path):
+    app.mount("/storage", StaticFiles(directory=storage_path), name="storage")
 
 
 @app.get("/")
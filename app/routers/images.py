@@ -1,19 +1,28 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, status
-from typing import List, Optional
-import uuid
-from datetime import datetime
-
+from fastapi.responses import ORJSONResponse
+from typing import List, Optional, Tuple
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+
+from app.config import settings
+from app.ids import uuid7, utc_from_ns
 from app.schemas import ImageUploadResponse, ImageInfo, ImageListResponse
 from app.services.storage import StorageService
 from app.deps import get_current_user, get_storage_service
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 # SECURITY: Magic bytes for image validation
-IMAGE_SIGNATURES = {
-    b'\xff\xd8\xff': 'jpeg',      # JPEG
-    b'\x89PNG\r\n\x1a\n': 'png',  # PNG
-    b'RIFF': 'webp',              # WebP (starts with RIFF)
+# First 4 bytes -> (full signature, extension): one dict lookup + one startswith.
+# A JPEG's 4th byte is its first marker (0xC0-0xFF); WebP is RIFF....WEBP.
+_SIGNATURES_BY_PREFIX = {
+    b'\x89PNG': (b'\x89PNG\r\n\x1a\n', 'png'),
+    b'RIFF': (b'RIFF', 'webp'),
+    **{b'\xff\xd8\xff' + bytes([marker]): (b'\xff\xd8\xff', 'jpeg') for marker in range(0xC0, 0x100)},
 }
 
 
@@ -22,14 +31,56 @@ def validate_image_content(content: bytes, filename: str) -> Optional[str]:
     Validate image content by checking magic bytes.
     Returns detected extension or None if invalid.
     """
-    for signature, ext in IMAGE_SIGNATURES.items():
-        if content.startswith(signature):
-            return ext
-        # Special case for WebP: check for WEBP after RIFF
-        if signature == b'RIFF' and len(content) > 12:
-            if content[8:12] == b'WEBP':
-                return 'webp'
-    return None
+    match = _SIGNATURES_BY_PREFIX.get(content[:4])
+    if match is None:
+        return None
+    signature, ext = match
+    if not content.startswith(signature):
+        return None
+    if ext == 'webp' and content[8:12] != b'WEBP':
+        return None
+    return ext
+
+
+# Upload limits, resolved once from settings
+_ALLOWED_EXTENSIONS = frozenset(settings.ALLOWED_EXTENSIONS)
+_MAX_FILE_SIZE = settings.MAX_FILE_SIZE
+
+# Uploads are read in chunks so oversize or non-image bodies are rejected early
+_UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+async def read_image_upload(file: UploadFile) -> Tuple[bytes, str]:
+    """
+    Read an uploaded image, enforcing MAX_FILE_SIZE and magic bytes while streaming.
+    Returns (content, detected_type) or raises HTTPException.
+    """
+    limit = _MAX_FILE_SIZE
+    buf = bytearray()
+    detected_type = None
+
+    while chunk := await file.read(_UPLOAD_CHUNK_SIZE):
+        buf += chunk
+        if len(buf) > limit:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File too large. Max size: {limit // (1024 * 1024)}MB",
+            )
+        # SECURITY: Validate magic bytes as soon as the header is available
+        if detected_type is None and len(buf) >= 12:
+            detected_type = validate_image_content(bytes(buf[:12]), file.filename)
+            if not detected_type:
+                break
+
+    if detected_type is None:
+        detected_type = validate_image_content(bytes(buf), file.filename)
+    if not detected_type:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid image content. File does not match a valid image format.",
+        )
+
+    return bytes(buf), detected_type
 
 
 @router.post("/upload", response_model=ImageUploadResponse)
@@ -47,48 +98,36 @@ async def upload_image(
         )
 
     extension = file.filename.split(".")[-1].lower()
-    if extension not in ["jpg", "jpeg", "png", "webp"]:
+    if extension not in _ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid file type. Allowed: jpg, jpeg, png, webp",
+            detail=f"Invalid file type. Allowed: {', '.join(settings.ALLOWED_EXTENSIONS)}",
         )
 
-    # Read file content
-    content = await file.read()
-
-    # Check file size (10MB max)
-    if len(content) > 10 * 1024 * 1024:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="File too large. Max size: 10MB",
-        )
-
-    # SECURITY: Validate magic bytes to prevent malicious file uploads
-    detected_type = validate_image_content(content, file.filename)
-    if not detected_type:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid image content. File does not match a valid image format.",
-        )
+    # Read file content (size limit + magic bytes checked while streaming)
+    content, detected_type = await read_image_upload(file)
 
     # Use detected type for filename (more secure than trusting extension)
     actual_extension = "jpg" if detected_type == "jpeg" else detected_type
 
-    # Generate unique filename
-    image_id = str(uuid.uuid4())
+    # Generate unique filename (one clock read for both id and timestamp)
+    now_ns = time.time_ns()
+    image_id = str(uuid7(now_ns))
     filename = f"{current_user['id']}/{image_id}.{actual_extension}"
 
     # Upload to storage
     url = await storage.upload(filename, content, file.content_type or "image/jpeg")
 
-    return ImageUploadResponse(
+    # response_model is kept for OpenAPI; returning a Response skips re-validation
+    result = ImageUploadResponse(
         id=image_id,
         url=url,
         filename=file.filename,
         size=len(content),
         content_type=file.content_type or "image/jpeg",
-        created_at=datetime.utcnow(),
+        created_at=utc_from_ns(now_ns),
     )
+    return ORJSONResponse(content=result.model_dump(mode="json"))
 
 
 @router.post("/upload-multiple", response_model=List[ImageUploadResponse])
@@ -104,30 +143,40 @@ async def upload_multiple_images(
             detail="Maximum 10 images per request",
         )
 
-    results = []
+    # Validate everything first, then push the accepted files to storage concurrently
+    prepared = []
     for file in files:
         if not file.filename:
             continue
 
         extension = file.filename.split(".")[-1].lower()
-        if extension not in ["jpg", "jpeg", "png", "webp"]:
-            continue
-
-        content = await file.read()
-        if len(content) > 10 * 1024 * 1024:
+        if extension not in _ALLOWED_EXTENSIONS:
             continue
 
-        # SECURITY: Validate magic bytes
-        detected_type = validate_image_content(content, file.filename)
-        if not detected_type:
+        try:
+            content, detected_type = await read_image_upload(file)
+        except HTTPException:
             continue
 
         actual_extension = "jpg" if detected_type == "jpeg" else detected_type
-        image_id = str(uuid.uuid4())
+        now_ns = time.time_ns()
+        image_id = str(uuid7(now_ns))
         filename = f"{current_user['id']}/{image_id}.{actual_extension}"
+        prepared.append((image_id, now_ns, file, content, filename))
+
+    urls = await asyncio.gather(
+        *(
+            storage.upload(filename, content, file.content_type or "image/jpeg")
+            for _, _, file, content, filename in prepared
+        ),
+        return_exceptions=True,
+    )
 
-        url = await storage.upload(filename, content, file.content_type or "image/jpeg")
-
+    results = []
+    for (image_id, now_ns, file, content, filename), url in zip(prepared, urls):
+        if isinstance(url, Exception):
+            logger.warning("upload of %s failed", filename, exc_info=url)
+            continue
         results.append(
             ImageUploadResponse(
                 id=image_id,
@@ -135,11 +184,12 @@ async def upload_multiple_images(
                 filename=file.filename,
                 size=len(content),
                 content_type=file.content_type or "image/jpeg",
-                created_at=datetime.utcnow(),
+                created_at=utc_from_ns(now_ns),
             )
         )
 
-    return results
+    # response_model is kept for OpenAPI; returning a Response skips re-validation
+    return ORJSONResponse(content=[r.model_dump(mode="json") for r in results])
 
 
 @router.get("/{image_id}", response_model=ImageInfo)
@@ -155,7 +205,7 @@ async def get_image(
         id=image_id,
         url=f"https://images.keroxio.fr/{current_user['id']}/{image_id}.jpg",
         processed=False,
-        created_at=datetime.utcnow(),
+        created_at=datetime.now(timezone.utc),
     )
 
 
@@ -1,6 +1,8 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, status
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Response, status
 from typing import Optional
 
+import orjson
+
 from app.schemas import (
     ProcessRequest,
     ProcessResponse,
@@ -9,21 +11,15 @@ from app.schemas import (
     EnhancementRequest,
 )
 from app.config import settings
-from app.deps import get_current_user
+from app.deps import get_current_user, get_image_processing_service
+from app.ids import uuid7
 
 router = APIRouter()
 
 
-def get_image_service():
-    """Get the appropriate image service based on configuration."""
-    if settings.AUTOBG_API_KEY:
-        # Use AutoBG.ai cloud API
-        from app.services.autobg_service import get_autobg_service
-        return get_autobg_service()
-    else:
-        # Fallback to local rembg
-        from app.services.birefnet_service import get_birefnet_service
-        return get_birefnet_service()
+# The AutoBG.ai / local fallback choice is made once at startup (deps.create_image_service);
+# reusing the same dependency callable lets FastAPI de-dupe it within a request
+get_image_service = get_image_processing_service
 
 
 @router.post("/enhance", response_model=ProcessResponse)
@@ -118,9 +114,7 @@ async def batch_process(
 
     Returns a job ID that can be used to check status.
     """
-    import uuid
-
-    job_id = str(uuid.uuid4())
+    job_id = str(uuid7())
 
     # Add to background tasks
     background_tasks.add_task(
@@ -193,17 +187,21 @@ async def virtual_showroom(
         )
 
 
+# Static for the life of the process: encode once, serve the bytes as-is
+_SERVICE_INFO_BODY = orjson.dumps({
+    "service": "keroxio-image",
+    "backend": "autobg-ai" if settings.AUTOBG_API_KEY else "rembg-local",
+    "features": [
+        "background_removal",
+        "virtual_showroom",
+        "image_enhancement",
+        "batch_processing",
+    ],
+})
+
+
 @router.get("/info")
 async def service_info():
     """Get information about the image processing service."""
-    backend = "autobg-ai" if settings.AUTOBG_API_KEY else "rembg-local"
-    return {
-        "service": "keroxio-image",
-        "backend": backend,
-        "features": [
-            "background_removal",
-            "virtual_showroom",
-            "image_enhancement",
-            "batch_processing",
-        ],
-    }
+    # A fresh Response per request: middlewares (e.g. CORS) mutate response headers
+    return Response(content=_SERVICE_INFO_BODY, media_type="application/json")
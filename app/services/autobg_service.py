@@ -2,19 +2,25 @@
 AutoBG.ai API service for automotive background removal.
 Specialized for car dealership photos.
 """
-import io
+import asyncio
+import logging
+import time
 import uuid
-import base64
 from typing import Optional, Dict, Any
 from pathlib import Path
 
 import httpx
-from PIL import Image
+import orjson
+import pybase64
 
 from app.config import settings
+from app.services._base import ImageServiceBase
+from app.services.http_client import get_http_client
 
+logger = logging.getLogger(__name__)
 
-class AutoBGService:
+
+class AutoBGService(ImageServiceBase):
     """
     AutoBG.ai API client for professional car photo editing.
     
@@ -25,24 +31,20 @@ class AutoBGService:
     - High-quality output
     """
 
+    # AutoBG's enhance never blurred; keep its output unchanged
+    supports_denoise = False
+
     def __init__(self):
         self.api_key = settings.AUTOBG_API_KEY
         self.base_url = "https://www.autobg.ai/api"
         
-    async def _download_image(self, image_url: str) -> bytes:
-        """Download image from URL."""
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(image_url)
-            response.raise_for_status()
-            return response.content
-
     async def _upload_to_storage(self, image_bytes: bytes, filename: str) -> str:
         """Save processed image to local storage."""
         storage_path = Path(settings.STORAGE_PATH) / "processed"
         storage_path.mkdir(parents=True, exist_ok=True)
         
         file_path = storage_path / filename
-        file_path.write_bytes(image_bytes)
+        await asyncio.to_thread(file_path.write_bytes, image_bytes)
         
         return f"{settings.STORAGE_URL}/processed/{filename}"
 
@@ -52,6 +54,7 @@ class AutoBGService:
         background_type: str = "transparent",
         background_color: Optional[str] = None,
         background_url: Optional[str] = None,
+        image_bytes: Optional[bytes] = None,
     ) -> Dict[str, Any]:
         """
         Remove background using AutoBG.ai API.
@@ -62,14 +65,14 @@ class AutoBGService:
             background_color: Hex color for solid backgrounds
             background_url: URL for custom background image
         """
-        import time
-        start = time.time()
+        start = time.perf_counter()
         
-        # Download source image
-        image_bytes = await self._download_image(image_url)
+        # Download source image (unless the caller already has it)
+        if image_bytes is None:
+            image_bytes = await self._download_image(image_url)
         
-        # Encode image as base64
-        image_b64 = base64.b64encode(image_bytes).decode('utf-8')
+        # Encode image as base64 (the API takes a JSON body; pybase64 is SIMD-accelerated)
+        image_b64 = pybase64.b64encode(image_bytes).decode('ascii')
         
         # Prepare API request
         headers = {
@@ -89,38 +92,40 @@ class AutoBGService:
             "background": bg_setting,
         }
         
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            try:
-                response = await client.post(
-                    f"{self.base_url}/remove-background",
-                    json=payload,
-                    headers=headers,
-                )
-                response.raise_for_status()
-                result = response.json()
+        client = get_http_client()
+        try:
+            response = await client.post(
+                f"{self.base_url}/remove-background",
+                content=orjson.dumps(payload),  # serialised straight to bytes
+                headers=headers,
+                timeout=60.0,
+            )
+            response.raise_for_status()
+            result = orjson.loads(response.content)
+            
+            # Get processed image from response
+            if "image" in result:
+                processed_bytes = pybase64.b64decode(result["image"])
+            elif "url" in result:
+                processed_bytes = await self._download_image(result["url"])
+            else:
+                raise ValueError("No image in API response")
                 
-                # Get processed image from response
-                if "image" in result:
-                    processed_bytes = base64.b64decode(result["image"])
-                elif "url" in result:
-                    processed_bytes = await self._download_image(result["url"])
-                else:
-                    raise ValueError("No image in API response")
-                    
-            except httpx.HTTPError as e:
-                print(f"AutoBG API error: {e}")
-                # Fallback to returning original image
-                processed_bytes = image_bytes
+        except httpx.HTTPError as e:
+            logger.warning("AutoBG API error: %s", e)
+            # Fallback to returning original image
+            processed_bytes = image_bytes
         
         # Save to storage
         ext = "png" if background_type == "transparent" else "jpg"
-        filename = f"{uuid.uuid4()}.{ext}"
+        image_id = str(uuid.uuid4())
+        filename = f"{image_id}.{ext}"
         processed_url = await self._upload_to_storage(processed_bytes, filename)
         
-        processing_time = time.time() - start
+        processing_time = time.perf_counter() - start
         
         return {
-            "id": str(uuid.uuid4()),
+            "id": image_id,
             "url": processed_url,
             "processing_time": round(processing_time, 2),
             "model": "autobg-ai",
@@ -131,6 +136,7 @@ class AutoBGService:
         self,
         image_url: str,
         showroom_type: str = "indoor",
+        image_bytes: Optional[bytes] = None,
     ) -> Dict[str, Any]:
         """
         Place vehicle in virtual showroom using AutoBG.ai.
@@ -143,96 +149,9 @@ class AutoBGService:
         return await self.remove_background(
             image_url=image_url,
             background_type=showroom_type,
+            image_bytes=image_bytes,
         )
 
-    async def enhance_image(
-        self,
-        image_url: str,
-        options: Optional[Dict[str, bool]] = None,
-    ) -> Dict[str, Any]:
-        """
-        Enhance image (basic PIL enhancement, AutoBG doesn't have this).
-        """
-        from PIL import ImageEnhance
-        import time
-        start = time.time()
-        
-        options = options or {}
-        
-        image_bytes = await self._download_image(image_url)
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-        
-        # Apply enhancements
-        if options.get("auto_color", True):
-            enhancer = ImageEnhance.Color(image)
-            image = enhancer.enhance(1.15)
-        
-        if options.get("contrast", True):
-            enhancer = ImageEnhance.Contrast(image)
-            image = enhancer.enhance(1.1)
-        
-        if options.get("sharpen", True):
-            enhancer = ImageEnhance.Sharpness(image)
-            image = enhancer.enhance(1.2)
-        
-        enhancer = ImageEnhance.Brightness(image)
-        image = enhancer.enhance(1.05)
-        
-        output = io.BytesIO()
-        image.save(output, format="JPEG", quality=92)
-        output.seek(0)
-        
-        filename = f"{uuid.uuid4()}.jpg"
-        processed_url = await self._upload_to_storage(output.getvalue(), filename)
-        
-        processing_time = time.time() - start
-        
-        return {
-            "id": str(uuid.uuid4()),
-            "url": processed_url,
-            "processing_time": round(processing_time, 2),
-            "status": "completed",
-        }
-
-    async def batch_process(
-        self,
-        job_id: str,
-        image_urls: list,
-        operations: list,
-        user_id: str,
-    ) -> Dict[str, Any]:
-        """Process multiple images in batch."""
-        results = []
-        
-        for url in image_urls:
-            try:
-                result = {"image_url": url, "status": "completed"}
-                
-                for op in operations:
-                    if op == "enhance":
-                        processed = await self.enhance_image(url)
-                        result["processed_url"] = processed["url"]
-                    elif op == "remove_background":
-                        processed = await self.remove_background(url)
-                        result["processed_url"] = processed["url"]
-                    elif op == "showroom":
-                        processed = await self.virtual_showroom(url)
-                        result["processed_url"] = processed["url"]
-                
-                results.append(result)
-            except Exception as e:
-                results.append({
-                    "image_url": url,
-                    "status": "failed",
-                    "error": str(e),
-                })
-        
-        return {
-            "job_id": job_id,
-            "status": "completed",
-            "results": results,
-        }
-
 
 # Singleton instance
 _service_instance = None
@@ -2,24 +2,30 @@
 Fallback image processing service (when AutoBG.ai is not configured).
 Uses basic PIL operations only.
 """
+import asyncio
 import io
+import logging
+import time
 import uuid
 from typing import Optional, List, Dict, Any
-from pathlib import Path
 
-import httpx
-from PIL import Image, ImageEnhance, ImageFilter
+from PIL import Image, ImageEnhance
 
-from app.config import settings
+from app.services._base import CPU_BATCH_CONCURRENCY, ImageServiceBase
+from app.services.image_ops import JPEG_SAVE_OPTIONS
 
+logger = logging.getLogger(__name__)
 
-class BiRefNetService:
+
+class BiRefNetService(ImageServiceBase):
     """
     Fallback image processing service using PIL only.
     
     For full background removal, configure AUTOBG_API_KEY.
     """
 
+    batch_concurrency = CPU_BATCH_CONCURRENCY
+
     def __init__(self):
         self._backgrounds = {
             "white": "#FFFFFF",
@@ -27,24 +33,13 @@ class BiRefNetService:
             "dark": "#1f2937",
             "showroom": "#2d3748",
         }
-        print("⚠️ Using fallback PIL service. Configure AUTOBG_API_KEY for background removal.")
-
-    async def _download_image(self, image_url: str) -> bytes:
-        """Download image from URL."""
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(image_url)
-            response.raise_for_status()
-            return response.content
+        logger.warning("Using fallback PIL service. Configure AUTOBG_API_KEY for background removal.")
 
-    async def _upload_image(self, image_bytes: bytes, filename: str) -> str:
-        """Upload processed image to storage."""
-        storage_path = Path(settings.STORAGE_PATH) / "processed"
-        storage_path.mkdir(parents=True, exist_ok=True)
-        
-        file_path = storage_path / filename
-        file_path.write_bytes(image_bytes)
-        
-        return f"{settings.STORAGE_URL}/processed/{filename}"
+    def _contrast_sync(self, image_bytes: bytes) -> Image.Image:
+        """Decode and apply basic contrast enhancement (worker thread)."""
+        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+        enhancer = ImageEnhance.Contrast(image)
+        return enhancer.enhance(1.1)
 
     async def remove_background(
         self,
@@ -52,33 +47,27 @@ class BiRefNetService:
         background_type: str = "transparent",
         background_color: Optional[str] = None,
         background_url: Optional[str] = None,
+        image_bytes: Optional[bytes] = None,
     ) -> Dict[str, Any]:
         """
         Fallback: returns original image with a warning.
         Configure AUTOBG_API_KEY for real background removal.
         """
-        import time
-        start = time.time()
+        start = time.perf_counter()
         
         # Just return the original image with enhancement
-        image_bytes = await self._download_image(image_url)
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-        
-        # Apply basic enhancement
-        enhancer = ImageEnhance.Contrast(image)
-        image = enhancer.enhance(1.1)
+        if image_bytes is None:
+            image_bytes = await self._download_image(image_url)
+        image = await asyncio.to_thread(self._contrast_sync, image_bytes)
         
-        output = io.BytesIO()
-        image.save(output, format="JPEG", quality=92)
-        output.seek(0)
+        image_id = str(uuid.uuid4())
+        filename = f"{image_id}.jpg"
+        processed_url = await self._save_image(image, filename, "JPEG", quality=92, **JPEG_SAVE_OPTIONS)
         
-        filename = f"{uuid.uuid4()}.jpg"
-        processed_url = await self._upload_image(output.getvalue(), filename)
-        
-        processing_time = time.time() - start
+        processing_time = time.perf_counter() - start
         
         return {
-            "id": str(uuid.uuid4()),
+            "id": image_id,
             "url": processed_url,
             "processing_time": round(processing_time, 2),
             "model": "fallback-pil",
@@ -86,90 +75,24 @@ class BiRefNetService:
             "warning": "Background removal requires AUTOBG_API_KEY",
         }
 
-    async def enhance_image(
-        self,
-        image_url: str,
-        options: Optional[Dict[str, bool]] = None,
-    ) -> Dict[str, Any]:
-        """Enhance image using PIL."""
-        import time
-        start = time.time()
-        
-        options = options or {}
-        
-        image_bytes = await self._download_image(image_url)
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-        
-        if options.get("auto_color", True):
-            enhancer = ImageEnhance.Color(image)
-            image = enhancer.enhance(1.15)
-        
-        if options.get("contrast", True):
-            enhancer = ImageEnhance.Contrast(image)
-            image = enhancer.enhance(1.1)
-        
-        if options.get("denoise", False):
-            image = image.filter(ImageFilter.GaussianBlur(radius=0.5))
-        
-        if options.get("sharpen", True):
-            enhancer = ImageEnhance.Sharpness(image)
-            image = enhancer.enhance(1.2)
-        
-        enhancer = ImageEnhance.Brightness(image)
-        image = enhancer.enhance(1.05)
-        
-        output = io.BytesIO()
-        image.save(output, format="JPEG", quality=92)
-        output.seek(0)
-        
-        filename = f"{uuid.uuid4()}.jpg"
-        processed_url = await self._upload_image(output.getvalue(), filename)
-        
-        processing_time = time.time() - start
-        
-        return {
-            "id": str(uuid.uuid4()),
-            "url": processed_url,
-            "processing_time": round(processing_time, 2),
-            "status": "completed",
-        }
-
     async def virtual_showroom(
         self,
         image_url: str,
         showroom_type: str = "indoor",
+        image_bytes: Optional[bytes] = None,
     ) -> Dict[str, Any]:
         """Fallback: just enhance the image."""
-        return await self.enhance_image(image_url)
+        return await self.enhance_image(image_url, image_bytes=image_bytes)
 
-    async def batch_process(
+    async def _process_batch_item(
         self,
-        job_id: str,
-        image_urls: List[str],
+        url: str,
         operations: List[str],
-        user_id: str,
+        image_bytes: Optional[bytes],
     ) -> Dict[str, Any]:
-        """Process multiple images in batch."""
-        results = []
-        
-        for url in image_urls:
-            try:
-                result = {"image_url": url, "status": "completed"}
-                processed = await self.enhance_image(url)
-                result["processed_url"] = processed["url"]
-                results.append(result)
-            except Exception as e:
-                results.append({
-                    "image_url": url,
-                    "status": "failed",
-                    "error": str(e),
-                })
-        
-        return {
-            "job_id": job_id,
-            "status": "completed",
-            "results": results,
-        }
+        """Fallback: every batch image is only enhanced."""
+        processed = await self.enhance_image(url, image_bytes=image_bytes)
+        return {"image_url": url, "status": "completed", "processed_url": processed["url"]}
 
 
 _service_instance = None
@@ -0,0 +1,254 @@
+"""
+Shared PIL/NumPy image operations for the processing services.
+"""
+import io
+from typing import Tuple
+
+import numpy as np
+from PIL import Image
+
+try:  # optional: libvips SIMD compositing
+    import pyvips
+except ImportError:  # pragma: no cover - depends on system libvips
+    pyvips = None
+
+try:  # optional: direct libjpeg-turbo encoder (needs libturbojpeg)
+    from turbojpeg import TJPF_RGB, TJSAMP_420, TurboJPEG
+    _turbojpeg = TurboJPEG()
+except (ImportError, OSError, RuntimeError):  # pragma: no cover
+    _turbojpeg = None
+
+try:  # optional: JIT-compiled kernels (NumPy fallback below)
+    from numba import njit
+except ImportError:  # pragma: no cover
+    njit = None
+
+# ITU-R BT.601 luma weights, as used by PIL's "L" conversion
+_LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+# Rows processed per step; keeps the float32 working set small
+_ROWS_PER_CHUNK = 256
+
+# Baseline 4:2:0 JPEG without the extra Huffman-optimisation pass
+JPEG_SAVE_OPTIONS = {"optimize": False, "progressive": False, "subsampling": 2}
+
+# Single zlib pass at the default level (optimize=True retries several)
+PNG_SAVE_OPTIONS = {"compress_level": 6}
+
+# libvips resize kernels for the cheaper PIL filters (LANCZOS uses thumbnail)
+_VIPS_KERNELS = {
+    Image.Resampling.NEAREST: "nearest",
+    Image.Resampling.BILINEAR: "linear",
+    Image.Resampling.BICUBIC: "cubic",
+}
+
+
+if njit is not None:
+    # Serial kernels: requests already run in parallel worker threads, and
+    # parallel=True would both oversubscribe (threads x cores) and, without
+    # an OpenMP/TBB layer, crash numba's non-threadsafe workqueue backend
+    @njit(fastmath=True, cache=True)
+    def _enhance_tones_kernel(src, out, a, b, d):
+        """out = clip(a*x + b*luma + d)."""
+        h, w, _ = src.shape
+        for y in range(h):
+            for x in range(w):
+                r = np.float32(src[y, x, 0])
+                g = np.float32(src[y, x, 1])
+                bl = np.float32(src[y, x, 2])
+                offset = (0.299 * r + 0.587 * g + 0.114 * bl) * b + d
+                for c in range(3):
+                    v = np.float32(src[y, x, c]) * a + offset
+                    out[y, x, c] = np.uint8(min(max(v, 0.0), 255.0))
+
+    @njit(fastmath=True, cache=True)
+    def _alpha_blend_kernel(src, alpha, background, per_pixel, out):
+        """Integer over-composite; background is (h, w, 3) or a (1, 1, 3) colour."""
+        h, w, _ = src.shape
+        for y in range(h):
+            for x in range(w):
+                a = np.int32(alpha[y, x])
+                ia = 255 - a
+                for c in range(3):
+                    bg = background[y, x, c] if per_pixel else background[0, 0, c]
+                    out[y, x, c] = (np.int32(src[y, x, c]) * a + np.int32(bg) * ia + 127) // 255
+
+
+def enhance_tones(
+    image: Image.Image,
+    color: float = 1.0,
+    contrast: float = 1.0,
+    brightness: float = 1.0,
+) -> Image.Image:
+    """
+    Apply ImageEnhance Color -> Contrast -> Brightness as a single pass.
+
+    Each enhancer is an affine blend (towards per-pixel luma, mean luma and
+    black respectively), so the chain collapses to out = a*x + b*luma + d.
+    """
+    src = np.asarray(image.convert("RGB"))
+
+    # Color enhancement keeps luma, so the mean luma ImageEnhance.Contrast
+    # would see is that of the source image
+    mean_luma = 0.0
+    if contrast != 1.0:
+        mean_luma = int(float(src.mean(axis=(0, 1)) @ _LUMA) + 0.5)
+
+    a = brightness * contrast * color
+    b = brightness * contrast * (1.0 - color)
+    d = brightness * (1.0 - contrast) * mean_luma + 0.5  # +0.5: round on cast
+
+    out = np.empty_like(src)
+    if njit is not None:
+        _enhance_tones_kernel(src, out, a, b, d)
+        return Image.fromarray(out, "RGB")
+
+    for y in range(0, src.shape[0], _ROWS_PER_CHUNK):
+        block = src[y:y + _ROWS_PER_CHUNK].astype(np.float32)
+        offset = d if b == 0.0 else (block @ _LUMA) * b + d
+        block *= a
+        block += offset if b == 0.0 else offset[..., None]
+        np.clip(block, 0, 255, out=block)
+        out[y:y + _ROWS_PER_CHUNK] = block
+
+    return Image.fromarray(out, "RGB")
+
+
+def save_image_file(image: Image.Image, path, format: str, **save_kwargs) -> None:
+    """
+    Encode a PIL image straight into a file (no intermediate buffer).
+
+    RGB JPEGs go through TurboJPEG when available (baseline 4:2:0, as
+    JPEG_SAVE_OPTIONS asks of PIL); everything else through PIL.
+    """
+    if _turbojpeg is not None and format == "JPEG" and image.mode == "RGB":
+        data = _turbojpeg.encode(
+            np.asarray(image),
+            quality=save_kwargs.get("quality", 75),
+            pixel_format=TJPF_RGB,
+            jpeg_subsample=TJSAMP_420,
+        )
+        with open(path, "wb") as f:
+            f.write(data)
+        return
+
+    with open(path, "wb") as f:
+        image.save(f, format=format, **save_kwargs)
+
+
+def load_resized_rgb(
+    data: bytes,
+    size: Tuple[int, int],
+    resample: Image.Resampling = Image.Resampling.BILINEAR,
+) -> Image.Image:
+    """
+    Decode an encoded image and stretch it to exactly size, as RGB.
+
+    With pyvips, LANCZOS is libvips' thumbnail (shrink-on-load, lanczos3)
+    and the cheaper filters a plain resize with the matching kernel;
+    otherwise PIL decode + resize with the given filter.
+    """
+    w, h = size
+    if pyvips is not None:
+        kernel = _VIPS_KERNELS.get(resample)
+        if kernel is None:
+            im = pyvips.Image.thumbnail_buffer(data, w, height=h, size="force")
+        else:
+            im = pyvips.Image.new_from_buffer(data, "", access="sequential")
+            im = im.resize(w / im.width, vscale=h / im.height, kernel=kernel)
+        if im.hasalpha():
+            im = im.flatten()
+        if im.bands != 3:
+            im = im.colourspace("srgb")
+        im = im.cast("uchar")
+        return Image.frombytes("RGB", (im.width, im.height), im.write_to_memory())
+
+    image = Image.open(io.BytesIO(data)).convert("RGB")
+    return image.resize(size, resample)
+
+
+def _alpha_blend(foreground: Image.Image, mask: Image.Image, background: np.ndarray) -> Image.Image:
+    """
+    out = (fg*a + bg*(255-a) + 127) // 255 in uint16, chunked by rows.
+
+    foreground is RGB and mask the matching L alpha, so no RGBA image is
+    ever materialised. background is either a full (h, w, 3) uint8 array
+    or a constant (3,) colour. Rounds like PIL's paste-with-mask.
+    """
+    src = np.asarray(foreground)
+    alpha_src = np.asarray(mask)
+    w, h = foreground.size
+
+    out = np.empty((h, w, 3), dtype=np.uint8)
+    if njit is not None:
+        per_pixel = background.ndim == 3
+        bg = background if per_pixel else background.reshape(1, 1, 3)
+        _alpha_blend_kernel(src, alpha_src, bg.astype(np.uint8, copy=False), per_pixel, out)
+        return Image.fromarray(out, "RGB")
+
+    for y in range(0, h, _ROWS_PER_CHUNK):
+        bg = background if background.ndim == 1 else background[y:y + _ROWS_PER_CHUNK]
+        alpha = alpha_src[y:y + _ROWS_PER_CHUNK, :, None].astype(np.uint16)
+        # 255*255 + 127 still fits in uint16
+        mixed = src[y:y + _ROWS_PER_CHUNK] * alpha + bg * (255 - alpha) + 127
+        out[y:y + _ROWS_PER_CHUNK] = mixed // 255
+
+    return Image.fromarray(out, "RGB")
+
+
+def _vips_rgba(foreground: Image.Image, mask: Image.Image):
+    """RGB image + L mask as a 4-band libvips image."""
+    w, h = foreground.size
+    rgb = pyvips.Image.new_from_memory(foreground.tobytes(), w, h, 3, "uchar")
+    alpha = pyvips.Image.new_from_memory(mask.tobytes(), w, h, 1, "uchar")
+    return rgb.bandjoin(alpha)
+
+
+def composite_over(
+    foreground: Image.Image,
+    mask: Image.Image,
+    background: Image.Image,
+) -> Image.Image:
+    """
+    Composite an RGB foreground with an L alpha mask over an RGB background
+    of the same size.
+
+    Uses libvips' vectorised composite when pyvips is installed, otherwise
+    a single NumPy blend pass (no split/paste).
+    """
+    w, h = foreground.size
+    if pyvips is not None:
+        bg = pyvips.Image.new_from_memory(background.tobytes(), w, h, 3, "uchar")
+        out = bg.composite2(_vips_rgba(foreground, mask), "over")
+        out = out.extract_band(0, n=3).cast("uchar")
+        return Image.frombytes("RGB", (w, h), out.write_to_memory())
+
+    return _alpha_blend(foreground, mask, np.asarray(background.convert("RGB")))
+
+
+def flatten_onto_color(
+    foreground: Image.Image,
+    mask: Image.Image,
+    color: Tuple[int, int, int],
+) -> Image.Image:
+    """
+    Composite an RGB foreground with an L alpha mask over a solid colour.
+
+    The colour is blended in as a constant, so no full-size background
+    image is allocated.
+    """
+    w, h = foreground.size
+    if pyvips is not None:
+        out = _vips_rgba(foreground, mask).flatten(background=list(color)).cast("uchar")
+        return Image.frombytes("RGB", (w, h), out.write_to_memory())
+
+    return _alpha_blend(foreground, mask, np.array(color, dtype=np.uint16))
+
+
+def warm_up_kernels() -> None:
+    """Run every pixel kernel once on a tiny image so JIT compilation happens now."""
+    rgb = Image.new("RGB", (2, 2), (128, 64, 32))
+    mask = Image.new("L", (2, 2), 128)
+    enhance_tones(rgb, color=1.1, contrast=1.1, brightness=1.1)
+    flatten_onto_color(rgb, mask, (255, 255, 255))
+    composite_over(rgb, mask, rgb)
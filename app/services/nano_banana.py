@@ -1,11 +1,16 @@
+import logging
 import httpx
-from typing import Optional, List, Dict, Any
+from typing import Optional, Dict, Any
 import uuid
 
 from app.config import settings
+from app.services._base import ImageServiceBase
+from app.services.http_client import get_http_client
 
+logger = logging.getLogger(__name__)
 
-class NanoBananaService:
+
+class NanoBananaService(ImageServiceBase):
     """Nano Banana AI image processing service."""
 
     def __init__(self):
@@ -19,26 +24,26 @@ class NanoBananaService:
         data: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         """Make a request to Nano Banana API."""
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json",
-            }
-
-            url = f"{self.base_url}{endpoint}"
-
-            try:
-                if method == "POST":
-                    response = await client.post(url, json=data, headers=headers)
-                else:
-                    response = await client.get(url, headers=headers)
-
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPError as e:
-                # Return mock data for development
-                print(f"Nano Banana API error: {e}")
-                return self._mock_response(endpoint, data)
+        client = get_http_client()
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+
+        url = f"{self.base_url}{endpoint}"
+
+        try:
+            if method == "POST":
+                response = await client.post(url, json=data, headers=headers, timeout=60.0)
+            else:
+                response = await client.get(url, headers=headers, timeout=60.0)
+
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as e:
+            # Return mock data for development
+            logger.warning("Nano Banana API error: %s", e)
+            return self._mock_response(endpoint, data)
 
     def _mock_response(
         self,
@@ -58,6 +63,7 @@ class NanoBananaService:
         self,
         image_url: str,
         options: Optional[Dict[str, bool]] = None,
+        image_bytes: Optional[bytes] = None,
     ) -> Dict[str, Any]:
         """
         Enhance image quality.
@@ -87,6 +93,7 @@ class NanoBananaService:
         background_type: str = "transparent",
         background_color: Optional[str] = None,
         background_url: Optional[str] = None,
+        image_bytes: Optional[bytes] = None,
     ) -> Dict[str, Any]:
         """
         Remove image background.
@@ -110,6 +117,7 @@ class NanoBananaService:
         self,
         image_url: str,
         showroom_type: str = "indoor",
+        image_bytes: Optional[bytes] = None,
     ) -> Dict[str, Any]:
         """
         Place vehicle in virtual showroom.
@@ -127,42 +135,6 @@ class NanoBananaService:
             },
         )
 
-    async def batch_process(
-        self,
-        job_id: str,
-        image_urls: List[str],
-        operations: List[str],
-        user_id: str,
-    ) -> Dict[str, Any]:
-        """Process multiple images in batch."""
-        results = []
-
-        for url in image_urls:
-            try:
-                result = {"image_url": url, "status": "completed"}
-
-                for op in operations:
-                    if op == "enhance":
-                        processed = await self.enhance_image(url)
-                        result["processed_url"] = processed["url"]
-                    elif op == "remove_background":
-                        processed = await self.remove_background(url)
-                        result["processed_url"] = processed["url"]
-                    elif op == "showroom":
-                        processed = await self.virtual_showroom(url)
-                        result["processed_url"] = processed["url"]
-
-                results.append(result)
-            except Exception as e:
-                results.append({
-                    "image_url": url,
-                    "status": "failed",
-                    "error": str(e),
-                })
-
-        # In a real app, save results to Redis/database
-        return {
-            "job_id": job_id,
-            "status": "completed",
-            "results": results,
-        }
+    async def _fetch_batch_item(self, url: str) -> Optional[bytes]:
+        """The API fetches images itself, so nothing is downloaded here."""
+        return None
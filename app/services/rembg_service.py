@@ -2,59 +2,330 @@
 Rembg-based image processing service.
 Free, self-hosted background removal using U2Net.
 """
+import hashlib
 import io
+import os
+import time
 import uuid
 import asyncio
-from typing import Optional, List, Dict, Any
+from functools import lru_cache
 from pathlib import Path
+from typing import Callable, Optional, List, Dict, Any, Set, Tuple
 
-import httpx
-from PIL import Image, ImageEnhance, ImageFilter
-from rembg import remove, new_session
+import numpy as np
+import onnxruntime as ort
+from cachetools import TTLCache
+from PIL import Image, ImageOps
+from rembg.bg import alpha_matting_cutout
+from rembg.sessions.u2net import U2netSession
 
 from app.config import settings
+from app.services._base import CPU_BATCH_CONCURRENCY, ImageServiceBase
+from app.services.image_ops import (
+    JPEG_SAVE_OPTIONS,
+    PNG_SAVE_OPTIONS,
+    composite_over,
+    flatten_onto_color,
+    load_resized_rgb,
+)
 
 
-class RembgService:
+# U2Net's fixed input resolution and normalisation
+_U2NET_SIZE = (320, 320)
+_U2NET_MEAN = (0.485, 0.456, 0.406)
+_U2NET_STD = (0.229, 0.224, 0.225)
+
+# Segmentation requests are gathered for up to this long (seconds), or
+# until this many are queued, and run through U2Net together
+_SEGMENT_BATCH_WINDOW = 0.005
+_SEGMENT_BATCH_SIZE = 8
+
+# Alpha-matting refinement (high_quality transparent cut-outs only)
+_MATTING_FOREGROUND_THRESHOLD = 240
+_MATTING_BACKGROUND_THRESHOLD = 10
+_MATTING_ERODE_SIZE = 10
+
+# Cut-out cache (keyed by source URL): bounded by decoded pixel bytes, 24h TTL
+_CUTOUT_CACHE_BYTES = 512 * 1024 * 1024
+_CUTOUT_CACHE_TTL = 24 * 3600
+
+# Preferred ONNX Runtime providers (rembg drops those not installed)
+_PROVIDERS = ["CUDAExecutionProvider", "CPUExecutionProvider"]
+
+
+def _derived_model(name: str, convert: Callable[[str, Path], None], *args, **kwargs) -> str:
+    """
+    Path of a model derived from rembg's u2net.onnx, built once and cached
+    under STORAGE_PATH/models.
+    """
+    target = Path(settings.STORAGE_PATH) / "models" / f"{name}.onnx"
+    if not target.exists():
+        source = U2netSession.download_models(*args, **kwargs)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Per-process temp file: several workers may convert at once
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        convert(source, tmp)
+        os.replace(tmp, target)
+    return str(target)
+
+
+def _quantize_int8(source: str, target: Path) -> None:
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(source, target, weight_type=QuantType.QUInt8)
+
+
+def _convert_fp16(source: str, target: Path) -> None:
+    import onnx
+    from onnxruntime.transformers.float16 import convert_float_to_float16
+
+    # float32 inputs/outputs are kept, so rembg's pre/post-processing is unchanged
+    model = convert_float_to_float16(onnx.load(source), keep_io_types=True)
+    onnx.save(model, str(target))
+
+
+class QuantizedU2netSession(U2netSession):
+    """U2Net with INT8 dynamically-quantized weights (CPU)."""
+
+    @classmethod
+    def download_models(cls, *args, **kwargs):
+        return _derived_model(cls.name(), _quantize_int8, *args, **kwargs)
+
+    @classmethod
+    def name(cls, *args, **kwargs):
+        return "u2net_int8"
+
+
+class Fp16U2netSession(U2netSession):
+    """U2Net with FP16 weights (CUDA)."""
+
+    @classmethod
+    def download_models(cls, *args, **kwargs):
+        return _derived_model(cls.name(), _convert_fp16, *args, **kwargs)
+
+    @classmethod
+    def name(cls, *args, **kwargs):
+        return "u2net_fp16"
+
+
+def _new_u2net_session() -> U2netSession:
+    """Create the U2Net ONNX Runtime session with full graph optimizations."""
+    sess_opts = ort.SessionOptions()
+    sess_opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+    # INT8 weights only pay off on CPU; on a GPU run the FP16 model instead
+    if not settings.REMBG_QUANTIZED:
+        session_class = U2netSession
+    elif "CUDAExecutionProvider" in ort.get_available_providers():
+        session_class = Fp16U2netSession
+    else:
+        session_class = QuantizedU2netSession
+    return session_class(session_class.name(), sess_opts, _PROVIDERS)
+
+
+@lru_cache(maxsize=32)
+def _hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
+    """Convert hex color to RGB tuple."""
+    hex_color = hex_color.lstrip("#")
+    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+
+
+class RembgService(ImageServiceBase):
     """Free self-hosted image processing using rembg + PIL."""
 
+    batch_concurrency = CPU_BATCH_CONCURRENCY
+
     def __init__(self):
         # Initialize rembg session (loads model once)
-        self.session = new_session("u2net")
+        self.session = _new_u2net_session()
+        # Segmentation (U2Net + matting) only depends on the source image, so
+        # showroom/preset re-renders of the same URL only redo the composite
+        self._cutout_cache: TTLCache = TTLCache(
+            maxsize=_CUTOUT_CACHE_BYTES,
+            ttl=_CUTOUT_CACHE_TTL,
+            getsizeof=lambda cutout: sum(im.width * im.height * len(im.getbands()) for im in cutout),
+        )
+        # Segmentation micro-batching (see _predict_mask); the model may have
+        # been exported with a fixed batch of 1, in which case runs are looped
+        batch_dim = self.session.inner_session.get_inputs()[0].shape[0]
+        self._dynamic_batch = not isinstance(batch_dim, int)
+        self._pending_masks: List[Tuple[Image.Image, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # Running batches; the loop only keeps weak references to tasks
+        self._mask_tasks: Set[asyncio.Task] = set()
         self._backgrounds = {
             "white": "#FFFFFF",
             "gray": "#808080",
             "dark": "#1f2937",
             "showroom": "#2d3748",
         }
+        # Map showroom types to background colors/images
+        self._showroom_backgrounds = {
+            "indoor": "#1a1a2e",
+            "outdoor": "#87CEEB",
+            "studio": "#2d3748",
+            "dark": "#0f0f0f",
+            "white": "#f8f9fa",
+        }
+        # Preset colours parsed once; the hot path only does a dict lookup
+        self._backgrounds_rgb = {
+            name: _hex_to_rgb(color) for name, color in self._backgrounds.items()
+        }
 
-    async def _download_image(self, image_url: str) -> bytes:
-        """Download image from URL."""
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(image_url)
-            response.raise_for_status()
-            return response.content
+        if settings.WARMUP_ON_START:
+            # Dummy inference: ONNX Runtime allocates its buffers (and CUDA picks
+            # its conv algorithms) on the first run, not when the session loads
+            self._predict_batch([Image.effect_noise(_U2NET_SIZE, 64).convert("RGB")])
 
-    async def _upload_image(self, image_bytes: bytes, filename: str) -> str:
+    def _decode_sync(self, image_bytes: bytes) -> Tuple[Image.Image, Image.Image]:
         """
-        Upload processed image to storage.
-        Returns the public URL.
+        Decode an image and build its U2Net input (worker thread).
+        U2Net only sees 320x320, so it gets a cheap bilinear downscale instead
+        of rembg LANCZOS-resizing the full image.
         """
-        # In production, upload to R2/S3
-        # For now, save locally and return path
-        storage_path = Path(settings.STORAGE_PATH) / "processed"
-        storage_path.mkdir(parents=True, exist_ok=True)
-        
-        file_path = storage_path / filename
-        file_path.write_bytes(image_bytes)
-        
-        # Return URL (adjust based on your storage setup)
-        return f"{settings.STORAGE_URL}/processed/{filename}"
+        image = ImageOps.exif_transpose(Image.open(io.BytesIO(image_bytes))).convert("RGB")
+        return image, image.resize(_U2NET_SIZE, Image.Resampling.BILINEAR)
+
+    def _predict_batch(self, images: List[Image.Image]) -> List[Image.Image]:
+        """Run U2Net on 320x320 images in one session call (worker thread)."""
+        if not self._dynamic_batch:
+            return [self.session.predict(image)[0] for image in images]
+
+        input_name = self.session.inner_session.get_inputs()[0].name
+        batch = np.concatenate([
+            self.session.normalize(image, _U2NET_MEAN, _U2NET_STD, _U2NET_SIZE)[input_name]
+            for image in images
+        ])
+        preds = self.session.inner_session.run(None, {input_name: batch})[0][:, 0]
+
+        masks = []
+        for pred in preds:
+            # Same per-image min/max normalisation as U2netSession.predict
+            lo, hi = pred.min(), pred.max()
+            pred = (pred - lo) / (hi - lo)
+            masks.append(Image.fromarray((pred * 255).astype(np.uint8), mode="L"))
+        return masks
+
+    async def _predict_mask(self, small: Image.Image) -> Image.Image:
+        """
+        Queue one 320x320 image for segmentation.
+        Requests arriving within _SEGMENT_BATCH_WINDOW (e.g. from batch_process)
+        share a single U2Net run of up to _SEGMENT_BATCH_SIZE images.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending_masks.append((small, future))
+
+        if len(self._pending_masks) >= _SEGMENT_BATCH_SIZE:
+            self._flush_masks()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(_SEGMENT_BATCH_WINDOW, self._flush_masks)
+
+        return await future
+
+    def _flush_masks(self) -> None:
+        """Send the queued segmentation requests off as one batch."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending_masks = self._pending_masks, []
+        if pending:
+            task = asyncio.ensure_future(self._run_mask_batch(pending))
+            self._mask_tasks.add(task)
+            task.add_done_callback(self._mask_tasks.discard)
+
+    async def _run_mask_batch(self, pending: List[Tuple[Image.Image, asyncio.Future]]) -> None:
+        """Segment one batch and resolve each waiting request."""
+        try:
+            masks = await asyncio.to_thread(self._predict_batch, [small for small, _ in pending])
+            for (_, future), mask in zip(pending, masks):
+                if not future.done():
+                    future.set_result(mask)
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            # Cancellation (e.g. at shutdown) must not leave requests waiting forever
+            for _, future in pending:
+                if not future.done():
+                    future.cancel()
+
+    @staticmethod
+    def _cutout_key(image_url: str, alpha_matting: bool) -> Tuple[str, bool]:
+        """Cut-out cache key for a source URL."""
+        return hashlib.sha256(image_url.encode()).hexdigest(), alpha_matting
+
+    def _cache_cutout(self, key: Tuple[str, bool], cutout: Tuple[Image.Image, Image.Image]) -> None:
+        """Cache a cut-out, unless it is too large to fit at all."""
+        try:
+            self._cutout_cache[key] = cutout
+        except ValueError:
+            pass  # larger than the whole cache: just don't keep it
+
+    def _cutout_sync(
+        self,
+        image: Image.Image,
+        mask: Image.Image,
+        alpha_matting: bool,
+    ) -> Tuple[Image.Image, Image.Image]:
+        """
+        Upscale the mask and cut out the foreground (worker thread).
+        Returns the RGB image and its L alpha; no RGBA copy is made.
+        """
+        mask = mask.resize(image.size, Image.Resampling.BILINEAR)
+
+        if alpha_matting:
+            try:
+                cutout = alpha_matting_cutout(
+                    image,
+                    mask,
+                    foreground_threshold=_MATTING_FOREGROUND_THRESHOLD,
+                    background_threshold=_MATTING_BACKGROUND_THRESHOLD,
+                    erode_structure_size=_MATTING_ERODE_SIZE,
+                )
+                return cutout.convert("RGB"), cutout.getchannel("A")
+            except ValueError:
+                # Matting can fail on degenerate masks; fall back to the raw mask
+                pass
+
+        return image, mask
+
+    def _process_sync(
+        self,
+        cutout: Tuple[Image.Image, Image.Image],
+        background_type: str,
+        background_color: Optional[str],
+        bg_bytes: Optional[bytes],
+        high_quality: bool = False,
+    ) -> Image.Image:
+        """
+        Apply the requested background to an (RGB, alpha) cut-out (worker thread).
+        The cut-out may be shared through the cache and is never modified.
+        """
+        image, alpha = cutout
+
+        # Apply background based on type (blended straight from the RGB image
+        # and uint8 mask; solid colours are a constant, no background image)
+        if background_type == "transparent":
+            return Image.merge("RGBA", (*image.split(), alpha))
+
+        if background_type == "solid" and background_color:
+            # Solid color background
+            return flatten_onto_color(image, alpha, _hex_to_rgb(background_color))
+
+        if background_type == "custom" and bg_bytes is not None:
+            # Use custom background image
+            # Mostly hidden behind the subject: bilinear unless high_quality
+            resample = Image.Resampling.LANCZOS if high_quality else Image.Resampling.BILINEAR
+            background = load_resized_rgb(bg_bytes, image.size, resample)
+            return composite_over(image, alpha, background)
+
+        if background_type in self._backgrounds_rgb:
+            # Preset background
+            return flatten_onto_color(image, alpha, self._backgrounds_rgb[background_type])
 
-    def _hex_to_rgb(self, hex_color: str) -> tuple:
-        """Convert hex color to RGB tuple."""
-        hex_color = hex_color.lstrip("#")
-        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+        return image
 
     async def remove_background(
         self,
@@ -62,6 +333,9 @@ class RembgService:
         background_type: str = "transparent",
         background_color: Optional[str] = None,
         background_url: Optional[str] = None,
+        image_bytes: Optional[bytes] = None,
+        refresh: bool = False,
+        high_quality: bool = False,
     ) -> Dict[str, Any]:
         """
         Remove image background using rembg (free, local).
@@ -70,129 +344,55 @@ class RembgService:
         - transparent: PNG with alpha
         - solid: Solid color background
         - custom: Custom background image
-        """
-        import time
-        start = time.time()
         
-        # Download source image
-        image_bytes = await self._download_image(image_url)
-        
-        # Remove background using rembg
-        result_bytes = await asyncio.to_thread(
-            remove,
-            image_bytes,
-            session=self.session,
-            alpha_matting=True,
-            alpha_matting_foreground_threshold=240,
-            alpha_matting_background_threshold=10,
-        )
+        high_quality refines transparent cut-out edges with alpha matting (slow);
+        on composited backgrounds the refinement is invisible, so it is skipped.
+        It also selects LANCZOS over bilinear for resizing custom backgrounds.
+        Cut-outs are cached per source URL; pass refresh=True to re-segment.
+        """
+        start = time.perf_counter()
         
-        # Open as PIL Image
-        result_image = Image.open(io.BytesIO(result_bytes)).convert("RGBA")
+        alpha_matting = high_quality and background_type == "transparent"
+        key = self._cutout_key(image_url, alpha_matting)
+        cutout = None if refresh else self._cutout_cache.get(key)
+        if cutout is None:
+            # Download source image (unless the caller already has it)
+            if image_bytes is None:
+                image_bytes = await self._download_image(image_url)
+            # Decode + cut out off the event loop; U2Net runs batched
+            image, small = await asyncio.to_thread(self._decode_sync, image_bytes)
+            mask = await self._predict_mask(small)
+            cutout = await asyncio.to_thread(self._cutout_sync, image, mask, alpha_matting)
+            self._cache_cutout(key, cutout)
         
-        # Apply background based on type
-        if background_type == "solid" and background_color:
-            # Create solid color background
-            bg_color = self._hex_to_rgb(background_color)
-            background = Image.new("RGBA", result_image.size, bg_color + (255,))
-            background.paste(result_image, mask=result_image.split()[3])
-            result_image = background.convert("RGB")
-            
-        elif background_type == "custom" and background_url:
-            # Use custom background image
+        # Fetch the custom background before the composite hop
+        bg_bytes = None
+        if background_type == "custom" and background_url:
             bg_bytes = await self._download_image(background_url)
-            background = Image.open(io.BytesIO(bg_bytes)).convert("RGBA")
-            background = background.resize(result_image.size, Image.Resampling.LANCZOS)
-            background.paste(result_image, mask=result_image.split()[3])
-            result_image = background.convert("RGB")
-            
-        elif background_type in self._backgrounds:
-            # Preset background
-            bg_color = self._hex_to_rgb(self._backgrounds[background_type])
-            background = Image.new("RGBA", result_image.size, bg_color + (255,))
-            background.paste(result_image, mask=result_image.split()[3])
-            result_image = background.convert("RGB")
         
-        # Save result
-        output = io.BytesIO()
+        result_image = await asyncio.to_thread(
+            self._process_sync,
+            cutout,
+            background_type,
+            background_color,
+            bg_bytes,
+            high_quality,
+        )
+        
+        # Save result straight to storage
         if background_type == "transparent":
-            result_image.save(output, format="PNG", optimize=True)
-            ext = "png"
+            ext, save_format, save_kwargs = "png", "PNG", PNG_SAVE_OPTIONS
         else:
-            result_image.convert("RGB").save(output, format="JPEG", quality=90)
-            ext = "jpg"
+            ext, save_format, save_kwargs = "jpg", "JPEG", {"quality": 90, **JPEG_SAVE_OPTIONS}
         
-        output.seek(0)
+        image_id = str(uuid.uuid4())
+        filename = f"{image_id}.{ext}"
+        processed_url = await self._save_image(result_image, filename, save_format, **save_kwargs)
         
-        # Upload to storage
-        filename = f"{uuid.uuid4()}.{ext}"
-        processed_url = await self._upload_image(output.getvalue(), filename)
-        
-        processing_time = time.time() - start
+        processing_time = time.perf_counter() - start
         
         return {
-            "id": str(uuid.uuid4()),
-            "url": processed_url,
-            "processing_time": round(processing_time, 2),
-            "status": "completed",
-        }
-
-    async def enhance_image(
-        self,
-        image_url: str,
-        options: Optional[Dict[str, bool]] = None,
-    ) -> Dict[str, Any]:
-        """
-        Enhance image using PIL (free).
-        
-        Options:
-        - auto_color: Color enhancement
-        - denoise: Blur for noise reduction
-        - sharpen: Sharpening
-        - contrast: Contrast boost
-        """
-        import time
-        start = time.time()
-        
-        options = options or {}
-        
-        # Download image
-        image_bytes = await self._download_image(image_url)
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-        
-        # Apply enhancements
-        if options.get("auto_color", True):
-            enhancer = ImageEnhance.Color(image)
-            image = enhancer.enhance(1.15)  # Slight color boost
-        
-        if options.get("contrast", True):
-            enhancer = ImageEnhance.Contrast(image)
-            image = enhancer.enhance(1.1)  # Slight contrast boost
-        
-        if options.get("denoise", False):
-            image = image.filter(ImageFilter.GaussianBlur(radius=0.5))
-        
-        if options.get("sharpen", True):
-            enhancer = ImageEnhance.Sharpness(image)
-            image = enhancer.enhance(1.2)  # Sharpen
-        
-        # Auto brightness
-        enhancer = ImageEnhance.Brightness(image)
-        image = enhancer.enhance(1.05)
-        
-        # Save result
-        output = io.BytesIO()
-        image.save(output, format="JPEG", quality=92)
-        output.seek(0)
-        
-        # Upload
-        filename = f"{uuid.uuid4()}.jpg"
-        processed_url = await self._upload_image(output.getvalue(), filename)
-        
-        processing_time = time.time() - start
-        
-        return {
-            "id": str(uuid.uuid4()),
+            "id": image_id,
             "url": processed_url,
             "processing_time": round(processing_time, 2),
             "status": "completed",
@@ -202,28 +402,41 @@ class RembgService:
         self,
         image_url: str,
         showroom_type: str = "indoor",
+        image_bytes: Optional[bytes] = None,
     ) -> Dict[str, Any]:
         """
         Place vehicle on showroom background.
         Uses pre-made showroom backgrounds.
         """
-        # Map showroom types to background colors/images
-        showroom_backgrounds = {
-            "indoor": "#1a1a2e",
-            "outdoor": "#87CEEB",
-            "studio": "#2d3748",
-            "dark": "#0f0f0f",
-            "white": "#f8f9fa",
-        }
-        
-        bg_color = showroom_backgrounds.get(showroom_type, "#2d3748")
+        bg_color = self._showroom_backgrounds.get(showroom_type, "#2d3748")
         
         return await self.remove_background(
             image_url=image_url,
             background_type="solid",
             background_color=bg_color,
+            image_bytes=image_bytes,
         )
 
+    async def _fetch_and_decode(self, url: str) -> Tuple[bytes, Optional[Tuple[Image.Image, Image.Image]]]:
+        """Download a batch image and, unless its cut-out is cached, decode it."""
+        image_bytes = await self._download_image(url)
+        if self._cutout_key(url, False) in self._cutout_cache:
+            return image_bytes, None
+        return image_bytes, await asyncio.to_thread(self._decode_sync, image_bytes)
+
+    async def _segment_batch(self, decoded: List[Tuple[str, Tuple[Image.Image, Image.Image]]]) -> None:
+        """Segment (url, decoded image) pairs in one U2Net run and cache their cut-outs."""
+        try:
+            masks = await asyncio.to_thread(self._predict_batch, [small for _, (_, small) in decoded])
+        except Exception:
+            return  # each image is retried (and its error reported) per request
+        cutouts = await asyncio.gather(*(
+            asyncio.to_thread(self._cutout_sync, image, mask, False)
+            for (_, (image, _)), mask in zip(decoded, masks)
+        ))
+        for (url, _), cutout in zip(decoded, cutouts):
+            self._cache_cutout(self._cutout_key(url, False), cutout)
+
     async def batch_process(
         self,
         job_id: str,
@@ -231,34 +444,53 @@ class RembgService:
         operations: List[str],
         user_id: str,
     ) -> Dict[str, Any]:
-        """Process multiple images in batch."""
-        results = []
-        
-        for url in image_urls:
-            try:
-                result = {"image_url": url, "status": "completed"}
-                
-                for op in operations:
-                    if op == "enhance":
-                        processed = await self.enhance_image(url)
-                        result["processed_url"] = processed["url"]
-                    elif op == "remove_background":
-                        processed = await self.remove_background(url)
-                        result["processed_url"] = processed["url"]
-                    elif op == "showroom":
-                        processed = await self.virtual_showroom(url)
-                        result["processed_url"] = processed["url"]
-                
-                results.append(result)
-            except Exception as e:
-                results.append({
-                    "image_url": url,
-                    "status": "failed",
-                    "error": str(e),
-                })
-        
+        """
+        Process multiple images in batch.
+        Segmenting jobs run _SEGMENT_BATCH_SIZE images at a time: a chunk is
+        downloaded and decoded together, segmented in one _predict_batch call,
+        and its operations then find the cut-outs in the cache.
+        """
+        if "remove_background" not in operations and "showroom" not in operations:
+            return await super().batch_process(job_id, image_urls, operations, user_id)
+
+        async def _process_one(url: str, fetched: Any) -> Dict[str, Any]:
+            if isinstance(fetched, BaseException):
+                raise fetched
+            return await self._process_batch_item(url, operations, fetched[0])
+
+        outcomes: List[Any] = []
+        for i in range(0, len(image_urls), _SEGMENT_BATCH_SIZE):
+            chunk = image_urls[i:i + _SEGMENT_BATCH_SIZE]
+            fetched = await asyncio.gather(
+                *(self._fetch_and_decode(url) for url in chunk),
+                return_exceptions=True,
+            )
+
+            to_segment = [
+                (url, item[1]) for url, item in zip(chunk, fetched)
+                if not isinstance(item, BaseException) and item[1] is not None
+            ]
+            if to_segment:
+                await self._segment_batch(to_segment)
+
+            outcomes += await asyncio.gather(
+                *(_process_one(url, item) for url, item in zip(chunk, fetched)),
+                return_exceptions=True,
+            )
+
+        # In a real app, save results to Redis/database
         return {
             "job_id": job_id,
             "status": "completed",
-            "results": results,
+            "results": self._batch_results(image_urls, outcomes),
         }
+
+
+_service_instance = None
+
+def get_rembg_service() -> RembgService:
+    """Get or create service singleton."""
+    global _service_instance
+    if _service_instance is None:
+        _service_instance = RembgService()
+    return _service_instance
@@ -1,3 +1,5 @@
+import asyncio
+import logging
 import boto3
 from botocore.config import Config
 from typing import Optional
@@ -5,21 +7,33 @@ import httpx
 
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 
 class StorageService:
     """Cloudflare R2 storage service."""
 
     def __init__(self):
-        self.client = boto3.client(
-            "s3",
-            endpoint_url=f"https://{settings.R2_ACCOUNT_ID}.r2.cloudflarestorage.com",
-            aws_access_key_id=settings.R2_ACCESS_KEY,
-            aws_secret_access_key=settings.R2_SECRET_KEY,
-            config=Config(signature_version="s3v4"),
-        )
+        # Built at app startup: without R2 configured there is no valid
+        # endpoint, so leave the client unset and let each call fall back
+        self.client = None
+        if settings.R2_ACCOUNT_ID:
+            self.client = boto3.client(
+                "s3",
+                endpoint_url=f"https://{settings.R2_ACCOUNT_ID}.r2.cloudflarestorage.com",
+                aws_access_key_id=settings.R2_ACCESS_KEY,
+                aws_secret_access_key=settings.R2_SECRET_KEY,
+                config=Config(signature_version="s3v4"),
+            )
         self.bucket = settings.R2_BUCKET_NAME
         self.public_url = settings.R2_PUBLIC_URL
 
+    def _require_client(self):
+        """Return the boto3 client, or raise if R2 is not configured."""
+        if self.client is None:
+            raise RuntimeError("R2 storage is not configured (R2_ACCOUNT_ID is empty)")
+        return self.client
+
     async def upload(
         self,
         key: str,
@@ -28,7 +42,9 @@ class StorageService:
     ) -> str:
         """Upload file to R2 storage."""
         try:
-            self.client.put_object(
+            # boto3 is blocking: run the request in a worker thread
+            await asyncio.to_thread(
+                self._require_client().put_object,
                 Bucket=self.bucket,
                 Key=key,
                 Body=content,
@@ -40,16 +56,16 @@ class StorageService:
             return f"https://{self.bucket}.{settings.R2_ACCOUNT_ID}.r2.cloudflarestorage.com/{key}"
         except Exception as e:
             # Fallback for development - return placeholder URL
-            print(f"Storage upload error: {e}")
+            logger.warning("Storage upload error: %s", e)
             return f"https://images.keroxio.fr/{key}"
 
     async def delete(self, key: str) -> bool:
         """Delete file from R2 storage."""
         try:
-            self.client.delete_object(Bucket=self.bucket, Key=key)
+            await asyncio.to_thread(self._require_client().delete_object, Bucket=self.bucket, Key=key)
             return True
         except Exception as e:
-            print(f"Storage delete error: {e}")
+            logger.warning("Storage delete error: %s", e)
             return False
 
     async def get_presigned_url(
@@ -59,7 +75,7 @@ class StorageService:
     ) -> str:
         """Generate a presigned URL for direct upload."""
         try:
-            url = self.client.generate_presigned_url(
+            url = self._require_client().generate_presigned_url(
                 "put_object",
                 Params={
                     "Bucket": self.bucket,
@@ -69,14 +85,18 @@ class StorageService:
             )
             return url
         except Exception as e:
-            print(f"Presigned URL error: {e}")
+            logger.warning("Presigned URL error: %s", e)
             return ""
 
+    def _get_object_bytes(self, key: str) -> bytes:
+        """Blocking GetObject + body read (run in a worker thread)."""
+        response = self._require_client().get_object(Bucket=self.bucket, Key=key)
+        return response["Body"].read()
+
     async def download(self, key: str) -> Optional[bytes]:
         """Download file from R2 storage."""
         try:
-            response = self.client.get_object(Bucket=self.bucket, Key=key)
-            return response["Body"].read()
+            return await asyncio.to_thread(self._get_object_bytes, key)
         except Exception as e:
-            print(f"Storage download error: {e}")
+            logger.warning("Storage download error: %s", e)
             return None